@@ -1,8 +1,14 @@
+import os
 import sys
-from fastapi import FastAPI, Depends, HTTPException, status
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
+from typing import Dict, Optional
 
 # FIX: Ensure compatibility for Annotated on Python < 3.9
 if sys.version_info < (3, 9):
@@ -19,7 +25,19 @@ else:
     from typing import Annotated, List
 
 # Importing models and utility
-from models import get_db, Category, Product, Cart, Order, User
+from models import (
+    get_db,
+    create_tables,
+    db_session,
+    request_scope,
+    upsert,
+    SessionLocal,
+    Category,
+    Product,
+    Cart,
+    Order,
+    User,
+)
 from schemas import (
     Category as CategorySchema,
     CategoryCreate,
@@ -30,52 +48,79 @@ from schemas import (
     Order as OrderSchema,
     UserCreate,
     User as UserSchema,
+    Page,
 )
 from sqlalchemy.exc import IntegrityError
-from utils import get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
+from utils import (
+    hash_password_async,
+    start_hash_pool,
+    shutdown_hash_pool,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+)
+from cache import cache, cached, singleflight, REDIS_URL
 
 # ====================================================================
 # --- DEPENDENCY ALIAS DEFINITIONS (Ensuring definition before use) ---
 # ====================================================================
 
 # 1. Database Session Dependency
-SessionDep = Annotated[Session, Depends(get_db)]
+SessionDep = Annotated[AsyncSession, Depends(get_db)]
 
 
 # 2. Mock User Dependency Function
-def get_mock_user(db: SessionDep) -> User:
-    """
-    MOCK FUNCTION: Returns the first user in the database, or creates a mock admin.
-    This is used to bypass real authentication for development.
-    """
-    user = db.query(User).first()
+MOCK_ADMIN_PASSWORD = "mock_admin_password"
+_mock_admin_hash: Optional[str] = None  # computed once, on first use
+
+
+async def resolve_mock_user(db: AsyncSession) -> User:
+    """Returns the first user in the database, or creates a mock admin."""
+    result = await db.execute(select(User).order_by(User.id).limit(1))
+    user = result.scalar_one_or_none()
 
     if user:
         return user
     else:
         # Fallback to create a MOCK ADMIN user if none exists
-        mock_password = "mock_admin_password"
-        # Local import here is safe as utils is defined outside app.py
-        from utils import get_password_hash
+        global _mock_admin_hash
+        if _mock_admin_hash is None:
+            _mock_admin_hash = await hash_password_async(MOCK_ADMIN_PASSWORD)
 
         mock_admin = User(
             username="MockAdmin",
             email="admin@test.com",
-            hashed_password=get_password_hash(mock_password),
+            hashed_password=_mock_admin_hash,
             is_admin=True,
         )
         try:
             db.add(mock_admin)
-            db.commit()
-            db.refresh(mock_admin)
+            await db.commit()
+            await db.refresh(mock_admin)
             return mock_admin
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=500, detail=f"Failed to create mock admin: {e}"
             )
 
 
+async def get_mock_user(request: Request, db: SessionDep) -> User:
+    """
+    MOCK FUNCTION: Returns the mock user resolved at startup (see `lifespan`).
+    This is used to bypass real authentication for development.
+    """
+    # Primary-key lookup instead of re-running the "first user" query.
+    user_id = getattr(request.app.state, "mock_user_id", None)
+    if user_id is not None:
+        user = await db.get(User, user_id)
+        if user is not None:
+            return user
+
+    # Not resolved yet, or that user was removed.
+    user = await resolve_mock_user(db)
+    request.app.state.mock_user_id = user.id
+    return user
+
+
 # 3. Current User Dependency Alias
 UserDep = Annotated[User, Depends(get_mock_user)]
 
@@ -90,11 +135,130 @@ def check_admin_permission(current_user: User):
         )
 
 
+# 5. Read-only list helpers
+def schema_columns(model, schema):
+    """Selects only the columns a response schema needs (Core, no ORM entity)."""
+    return select(*(getattr(model, name) for name in schema.model_fields))
+
+
+async def fetch_rows(db: AsyncSession, stmt):
+    """
+    Runs a Core select and returns plain dict rows (no ORM hydration).
+    FastAPI validates them against `response_model` once; returning models
+    instead would only add a step, since FastAPI dumps and re-validates them.
+    """
+    result = await db.execute(stmt)
+    return [dict(row._mapping) for row in result]
+
+
+def construct_all(schema, rows):
+    """
+    Builds models from trusted rows with `model_construct` (no validation).
+    Only for `cached` endpoints, whose encoded body bypasses `response_model`.
+    """
+    return [schema.model_construct(**row) for row in rows]
+
+
+# 6. Keyset pagination
+CursorParam = Annotated[int, Query(ge=0, description="Return rows with id > cursor")]
+LimitParam = Annotated[int, Query(ge=1, le=200)]
+
+
+async def fetch_page(db: AsyncSession, stmt, key, cursor: int, limit: int) -> dict:
+    """
+    Fetches one page with `WHERE key > cursor ORDER BY key LIMIT limit`, an
+    index seek on the primary key, unlike OFFSET which scans skipped rows.
+    Returns the `Page` shape as a dict of dict rows (see `fetch_rows`).
+    """
+    stmt = stmt.where(key > cursor).order_by(key).limit(limit)
+    items = await fetch_rows(db, stmt)
+    next_cursor = items[-1][key.key] if len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+# 7. Product price cache
+# Process-local {product_id: price} for the checkout path, loaded at startup.
+# It is only valid for the "products" cache generation it was filled under:
+# every product write bumps that generation (`cache.invalidate`, shared by all
+# workers through Redis), which empties the cache here on the next checkout.
+# Ids it has not seen are read from the DB on demand. Entries also expire
+# after PRICE_CACHE_TTL_SECONDS, bounding staleness if a bump is ever lost
+# (e.g. Redis failing during the write).
+PRICE_CACHE_TTL_SECONDS = 60
+PRICE_CACHE: Dict[int, float] = {}
+_price_cache_generation: Optional[int] = None
+_price_cache_expires_at = 0.0
+
+
+def _reset_price_cache(generation: Optional[int]):
+    global _price_cache_generation, _price_cache_expires_at
+    PRICE_CACHE.clear()
+    _price_cache_generation = generation
+    _price_cache_expires_at = time.monotonic() + PRICE_CACHE_TTL_SECONDS
+
+
+async def load_price_cache(db: AsyncSession):
+    generation = await cache.generation("products")
+    if generation is None:  # caching unavailable, see get_prices
+        return
+    result = await db.execute(select(Product.id, Product.price))
+    _reset_price_cache(generation)
+    PRICE_CACHE.update(result.all())
+
+
+async def get_prices(db: AsyncSession, product_ids) -> Dict[int, float]:
+    """Returns prices for existing products among `product_ids`."""
+    # Read the generation before the prices, so a write landing in between
+    # leaves the cache tagged as outdated rather than the reverse.
+    generation = await cache.generation("products")
+    if (
+        generation is None
+        or generation != _price_cache_generation
+        or time.monotonic() >= _price_cache_expires_at
+    ):
+        _reset_price_cache(generation)
+
+    prices = {pid: PRICE_CACHE[pid] for pid in product_ids if pid in PRICE_CACHE}
+    missing = {pid for pid in product_ids if pid not in prices}
+    if missing:
+        result = await db.execute(
+            select(Product.id, Product.price).where(Product.id.in_(missing))
+        )
+        fetched = dict(result.all())
+        prices.update(fetched)
+        if generation is not None:  # can't tell when these go stale otherwise
+            PRICE_CACHE.update(fetched)
+    return prices
+
+
 # ====================================================================
 # --- FastAPI Setup ---
 # ====================================================================
 
-app = FastAPI(title="Shoe App Backend (UNSECURED)")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Sets up the database, caches, hashing pool and mock user."""
+    # Schema creation + seeding runs once per process; set SHOEAPP_INIT_DB=0
+    # when the schema is managed elsewhere (e.g. Alembic).
+    if os.getenv("SHOEAPP_INIT_DB", "1") == "1":
+        await create_tables()
+    await cache.connect(REDIS_URL)
+    start_hash_pool()
+    async with SessionLocal() as db:
+        app.state.mock_user_id = (await resolve_mock_user(db)).id
+        await load_price_cache(db)
+    yield
+    await shutdown_hash_pool()
+    await cache.close()
+
+
+# orjson encodes every response body in C instead of the stdlib json module.
+app = FastAPI(
+    title="Shoe App Backend (UNSECURED)",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # --- CORS Configuration ---
 origins = [
@@ -112,33 +276,50 @@ app.add_middleware(
 )
 
 
+# --- Request-scoped DB session ---
+@app.middleware("http")
+async def scoped_db_session(request: Request, call_next):
+    """Gives each request its own session scope and releases it afterwards."""
+    token = request_scope.set(object())
+    try:
+        return await call_next(request)
+    finally:
+        await db_session.remove()
+        request_scope.reset(token)
+
+
 # ====================================================================
 # --- Public & Authentication Routes ---
 # ====================================================================
 
 
 @app.post("/users/", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-def create_user(user: UserCreate, db: SessionDep):
+async def create_user(user: UserCreate, db: SessionDep):
     """Creates a new user and hashes the password."""
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Username already registered")
-
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        hashed_password=hashed_password,
-        is_admin=False,
+    hashed_password = await hash_password_async(user.password)
+
+    # Single INSERT ... ON CONFLICT (username) DO NOTHING RETURNING *
+    stmt = (
+        upsert(User)
+        .values(
+            username=user.username,
+            email=user.email,
+            hashed_password=hashed_password,
+            is_admin=False,
+        )
+        .on_conflict_do_nothing(index_elements=["username"])
+        .returning(User)
     )
 
     try:
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        db_user = (await db.execute(stmt)).scalar_one_or_none()
+        if db_user is None:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="Username already registered")
+        await db.commit()
         return db_user
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="User could not be created due to database constraint.",
@@ -152,21 +333,29 @@ async def login_for_access_token():
 
 
 @app.get("/users/me", response_model=UserSchema)
-def read_users_me(current_user: UserDep):
+async def read_users_me(current_user: UserDep):
     """Retrieves information about the current mock user."""
     return current_user
 
 
-@app.get("/products", response_model=List[ProductSchema])
-def list_products(db: SessionDep):
-    """Retrieves all products."""
-    return db.query(Product).all()
+@app.get("/products", response_model=Page[ProductSchema])
+@cached("products:list", ttl_seconds=3600)
+async def list_products(
+    db: SessionDep, cursor: CursorParam = 0, limit: LimitParam = 50
+):
+    """Retrieves a page of products (cached until the next product/category write)."""
+    # Concurrent identical requests share a single SELECT (see `cached`).
+    stmt = schema_columns(Product, ProductSchema)
+    page = await fetch_page(db, stmt, Product.id, cursor, limit)
+    return {**page, "items": construct_all(ProductSchema, page["items"])}
 
 
 @app.get("/categories", response_model=List[CategorySchema])
-def list_categories(db: SessionDep):
-    """Retrieves all categories."""
-    return db.query(Category).all()
+@cached("categories:list", ttl_seconds=3600)
+async def list_categories(db: SessionDep):
+    """Retrieves all categories (cached until the next category write)."""
+    stmt = schema_columns(Category, CategorySchema)
+    return construct_all(CategorySchema, await fetch_rows(db, stmt))
 
 
 # ====================================================================
@@ -174,8 +363,14 @@ def list_categories(db: SessionDep):
 # ====================================================================
 
 
-@app.get("/cart/{user_id}", response_model=List[CartSchema])
-def get_user_cart(user_id: int, current_user: UserDep, db: SessionDep):
+@app.get("/cart/{user_id}", response_model=Page[CartSchema])
+async def get_user_cart(
+    user_id: int,
+    current_user: UserDep,
+    db: SessionDep,
+    cursor: CursorParam = 0,
+    limit: LimitParam = 50,
+):
     """
     Retrieves the contents of the current user's shopping cart.
     """
@@ -185,100 +380,126 @@ def get_user_cart(user_id: int, current_user: UserDep, db: SessionDep):
             detail="Cannot view other users' carts.",
         )
 
-    cart_items = db.query(Cart).filter(Cart.user_id == user_id).all()
-    return cart_items
+    async def load():
+        stmt = schema_columns(Cart, CartSchema).where(Cart.user_id == user_id)
+        return await fetch_page(db, stmt, Cart.id, cursor, limit)
+
+    return await singleflight(f"cart:{user_id}:{cursor}:{limit}", load)
 
 
 @app.post("/cart/add", response_model=CartSchema)
-def add_to_cart(cart_item_data: CartAdd, current_user: UserDep, db: SessionDep):
+async def add_to_cart(cart_item_data: CartAdd, current_user: UserDep, db: SessionDep):
     """Adds a product to the current mock user's cart or increments quantity."""
     product_id = cart_item_data.product_id
     quantity = cart_item_data.quantity
     user_id = current_user.id
 
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-
-    cart_item = (
-        db.query(Cart)
-        .filter(Cart.user_id == user_id, Cart.product_id == product_id)
-        .first()
+    if quantity > 0:
+        # Insert the line or bump its quantity in one atomic statement; the
+        # products FK rejects unknown product ids.
+        stmt = (
+            upsert(Cart)
+            .values(user_id=user_id, product_id=product_id, quantity=quantity)
+            .on_conflict_do_update(
+                index_elements=["user_id", "product_id"],
+                set_={"quantity": Cart.quantity + quantity},
+            )
+            .returning(Cart)
+            .execution_options(populate_existing=True)
+        )
+        try:
+            cart_item = (await db.execute(stmt)).scalar_one()
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="Product not found")
+        return cart_item
+
+    # Zero/negative quantities can only adjust an existing line.
+    stmt = (
+        update(Cart)
+        .where(Cart.user_id == user_id, Cart.product_id == product_id)
+        .values(quantity=Cart.quantity + quantity)
+        .returning(Cart)
+        .execution_options(populate_existing=True)
     )
+    cart_item = (await db.execute(stmt)).scalar_one_or_none()
 
-    if cart_item:
-        cart_item.quantity += quantity
-        if cart_item.quantity <= 0:
-            db.delete(cart_item)
-            db.commit()
-            raise HTTPException(status_code=200, detail="Item removed from cart.")
-
-        db.commit()
-        db.refresh(cart_item)
-    else:
-        if quantity <= 0:
-            raise HTTPException(
-                status_code=400, detail="Cannot add zero or negative quantity."
-            )
+    if cart_item is None:
+        if await db.get(Product, product_id) is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        raise HTTPException(
+            status_code=400, detail="Cannot add zero or negative quantity."
+        )
 
-        new_cart_item = Cart(user_id=user_id, product_id=product_id, quantity=quantity)
-        db.add(new_cart_item)
-        db.commit()
-        db.refresh(new_cart_item)
-        cart_item = new_cart_item
+    if cart_item.quantity <= 0:
+        await db.execute(delete(Cart).where(Cart.id == cart_item.id))
+        await db.commit()
+        raise HTTPException(status_code=200, detail="Item removed from cart.")
 
+    await db.commit()
     return cart_item
 
 
 @app.post(
     "/orders/create", response_model=OrderSchema, status_code=status.HTTP_201_CREATED
 )
-def place_order(current_user: UserDep, db: SessionDep):
+async def place_order(current_user: UserDep, db: SessionDep):
     """
     Creates a new order from the user's cart items and clears the cart.
     [Image of a transaction flow showing: 1. Fetch Cart Items + Product Prices -> 2. Calculate Total Cost -> 3. Create a new record in the Orders table with total amount -> 4. Delete all associated records from the Cart table -> 5. Commit Transaction.]
     """
     user_id = current_user.id
 
-    # 1. Fetch cart items and join with products to get prices
-    cart_data = (
-        db.query(Cart, Product).join(Product).filter(Cart.user_id == user_id).all()
+    # 1. Fetch the cart lines; prices come from PRICE_CACHE, so no JOIN
+    result = await db.execute(
+        select(Cart.product_id, Cart.quantity).where(Cart.user_id == user_id)
     )
+    cart_lines = result.all()
+    prices = await get_prices(db, {product_id for product_id, _ in cart_lines})
 
-    if not cart_data:
+    # Lines whose product no longer exists are ignored (and cleared below).
+    priced_lines = [(pid, qty) for pid, qty in cart_lines if pid in prices]
+    if not priced_lines:
         raise HTTPException(
             status_code=400, detail="Cart is empty, cannot place order."
         )
 
     # 2. Calculate Total Amount
-    total_amount = sum(
-        cart_item.quantity * product.price for cart_item, product in cart_data
-    )
+    total_amount = sum(qty * prices[pid] for pid, qty in priced_lines)
 
     # 3. Create the Order
     new_order = Order(user_id=user_id, total_amount=total_amount, status="Processing")
     db.add(new_order)
 
     # 4. Clear the Cart
-    db.query(Cart).filter(Cart.user_id == user_id).delete()
+    await db.execute(delete(Cart).where(Cart.user_id == user_id))
 
     # 5. Commit the Transaction
-    db.commit()
-    db.refresh(new_order)
+    # NOTE: All Order columns are set client-side (order_date uses a Python
+    # default), so no refresh round-trip is needed after the commit.
+    await db.commit()
 
     return new_order
 
 
-@app.get("/orders/user/{user_id}", response_model=List[OrderSchema])
-def list_orders_by_user(user_id: int, current_user: UserDep, db: SessionDep):
-    """Retrieves orders for a specific user."""
+@app.get("/orders/user/{user_id}", response_model=Page[OrderSchema])
+async def list_orders_by_user(
+    user_id: int,
+    current_user: UserDep,
+    db: SessionDep,
+    cursor: CursorParam = 0,
+    limit: LimitParam = 50,
+):
+    """Retrieves a page of orders for a specific user."""
     if user_id != current_user.id and not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Cannot view other users' orders.",
         )
 
-    return db.query(Order).filter(Order.user_id == user_id).all()
+    stmt = schema_columns(Order, OrderSchema).where(Order.user_id == user_id)
+    return await fetch_page(db, stmt, Order.id, cursor, limit)
 
 
 # ====================================================================
@@ -291,7 +512,9 @@ def list_orders_by_user(user_id: int, current_user: UserDep, db: SessionDep):
 @app.post(
     "/products/", response_model=ProductSchema, status_code=status.HTTP_201_CREATED
 )
-def create_product(product_data: ProductBase, current_user: UserDep, db: SessionDep):
+async def create_product(
+    product_data: ProductBase, current_user: UserDep, db: SessionDep
+):
     """Admin: Creates a new product."""
     check_admin_permission(current_user)
 
@@ -299,11 +522,12 @@ def create_product(product_data: ProductBase, current_user: UserDep, db: Session
 
     try:
         db.add(db_product)
-        db.commit()
-        db.refresh(db_product)
+        await db.commit()
+        await db.refresh(db_product)
+        await cache.invalidate("products")
         return db_product
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         if "FOREIGN KEY constraint failed" in str(e):
             raise HTTPException(
                 status_code=400, detail="Invalid category_id specified."
@@ -312,41 +536,50 @@ def create_product(product_data: ProductBase, current_user: UserDep, db: Session
 
 
 @app.put("/products/{product_id}", response_model=ProductSchema)
-def update_product(
+async def update_product(
     product_id: int, product_data: ProductBase, current_user: UserDep, db: SessionDep
 ):
     """Admin: Updates an existing product."""
     check_admin_permission(current_user)
 
-    db_product = db.query(Product).filter(Product.id == product_id).first()
-    if not db_product:
-        raise HTTPException(status_code=404, detail="Product not found")
-
-    for key, value in product_data.model_dump().items():
-        setattr(db_product, key, value)
+    # Single UPDATE ... RETURNING: no SELECT of the old row, no refresh.
+    stmt = (
+        update(Product)
+        .where(Product.id == product_id)
+        .values(**product_data.model_dump())
+        .returning(Product)
+        .execution_options(populate_existing=True)
+    )
 
     try:
-        db.commit()
-        db.refresh(db_product)
+        db_product = (await db.execute(stmt)).scalar_one_or_none()
+        if db_product is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        await db.commit()
+        await cache.invalidate("products")
         return db_product
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400, detail="Update failed, check if category_id is valid."
         )
 
 
 @app.delete("/products/{product_id}", status_code=status.HTTP_200_OK)
-def delete_product(product_id: int, current_user: UserDep, db: SessionDep):
+async def delete_product(product_id: int, current_user: UserDep, db: SessionDep):
     """Admin: Deletes a product."""
     check_admin_permission(current_user)
 
-    db_product = db.query(Product).filter(Product.id == product_id).first()
-    if not db_product:
+    # Bulk DELETEs in one transaction: no SELECT, no relationship loads. Cart
+    # lines for the product go with it (the FK would reject the DELETE).
+    await db.execute(delete(Cart).where(Cart.product_id == product_id))
+    result = await db.execute(delete(Product).where(Product.id == product_id))
+    if result.rowcount == 0:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Product not found")
 
-    db.delete(db_product)
-    db.commit()
+    await db.commit()
+    await cache.invalidate("products")
     return {"message": f"Product ID {product_id} deleted successfully."}
 
 
@@ -356,19 +589,29 @@ def delete_product(product_id: int, current_user: UserDep, db: SessionDep):
 @app.post(
     "/categories/", response_model=CategorySchema, status_code=status.HTTP_201_CREATED
 )
-def create_category(category: CategoryCreate, current_user: UserDep, db: SessionDep):
+async def create_category(
+    category: CategoryCreate, current_user: UserDep, db: SessionDep
+):
     """Admin: Creates a new category."""
     check_admin_permission(current_user)
 
-    db_category = Category(name=category.name)
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    stmt = (
+        upsert(Category)
+        .values(name=category.name)
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(Category)
+    )
+    db_category = (await db.execute(stmt)).scalar_one_or_none()
+    if db_category is None:
+        raise HTTPException(status_code=400, detail="Category already exists")
+
+    await db.commit()
+    await cache.invalidate("categories")
     return db_category
 
 
 @app.put("/categories/{category_id}", response_model=CategorySchema)
-def update_category(
+async def update_category(
     category_id: int,
     category_data: CategoryCreate,
     current_user: UserDep,
@@ -377,69 +620,93 @@ def update_category(
     """Admin: Updates an existing category's name."""
     check_admin_permission(current_user)
 
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
     category.name = category_data.name
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    await db.refresh(category)
+    await cache.invalidate("categories")
     return category
 
 
 @app.delete("/categories/{category_id}", status_code=status.HTTP_200_OK)
-def delete_category(category_id: int, current_user: UserDep, db: SessionDep):
+async def delete_category(category_id: int, current_user: UserDep, db: SessionDep):
     """Admin: Deletes a category."""
     check_admin_permission(current_user)
 
-    category = db.query(Category).filter(Category.id == category_id).first()
-    if not category:
+    # Products in the category are kept, uncategorized.
+    await db.execute(
+        update(Product)
+        .where(Product.category_id == category_id)
+        .values(category_id=None)
+    )
+    result = await db.execute(delete(Category).where(Category.id == category_id))
+    if result.rowcount == 0:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Category not found")
 
-    db.delete(category)
-    db.commit()
+    await db.commit()
+    # Deleting a category also clears category_id on its products.
+    await cache.invalidate("categories", "products")
     return {"message": f"Category ID {category_id} deleted successfully."}
 
 
 # --- Admin Orders ---
 
 
-@app.get("/orders", response_model=List[OrderSchema])
-def list_all_orders(current_user: UserDep, db: SessionDep):
-    """Admin: Retrieves all orders."""
+@app.get("/orders", response_model=Page[OrderSchema])
+async def list_all_orders(
+    current_user: UserDep,
+    db: SessionDep,
+    cursor: CursorParam = 0,
+    limit: LimitParam = 50,
+):
+    """Admin: Retrieves a page of all orders."""
     check_admin_permission(current_user)
-    return db.query(Order).all()
+    stmt = schema_columns(Order, OrderSchema)
+    return await fetch_page(db, stmt, Order.id, cursor, limit)
 
 
 # --- Admin Users ---
-@app.get("/users/all", response_model=List[UserSchema])
-def read_all_users(current_user: UserDep, db: SessionDep):
-    """Admin: Retrieves all users."""
+@app.get("/users/all", response_model=Page[UserSchema])
+async def read_all_users(
+    current_user: UserDep,
+    db: SessionDep,
+    cursor: CursorParam = 0,
+    limit: LimitParam = 50,
+):
+    """Admin: Retrieves a page of users."""
     check_admin_permission(current_user)
-    return db.query(User).all()
+    # Never reads hashed_password: only the UserSchema columns are selected.
+    stmt = schema_columns(User, UserSchema)
+    return await fetch_page(db, stmt, User.id, cursor, limit)
 
 
 @app.post("/admin/promote/{username}", response_model=UserSchema)
-def promote_user_to_admin(username: str, current_user: UserDep, db: SessionDep):
+async def promote_user_to_admin(username: str, current_user: UserDep, db: SessionDep):
     """Admin: Promotes a user to admin."""
     check_admin_permission(current_user)
 
-    user_to_promote = db.query(User).filter(User.username == username).first()
+    stmt = (
+        update(User)
+        .where(User.username == username)
+        .values(is_admin=True)
+        .returning(User)
+        .execution_options(populate_existing=True)
+    )
+    user_to_promote = (await db.execute(stmt)).scalar_one_or_none()
     if not user_to_promote:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    if user_to_promote.is_admin:
-        return user_to_promote
-
-    user_to_promote.is_admin = True
-    db.commit()
-    db.refresh(user_to_promote)
+    await db.commit()
 
     return user_to_promote
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Shoe App Backend Running"}
@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Redis is optional: without the package (or without REDIS_URL) the encoded
+# bodies are kept in an in-process LRU instead.
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Upper bound on bodies kept in process (one per distinct set of query args).
+LOCAL_CACHE_MAX_ENTRIES = 256
+
+
+def _known_single_process() -> bool:
+    """
+    The in-process store is only coherent within one process, so it is opt-in:
+    WORKERS must say "1" explicitly. gunicorn_conf.py exports the resolved
+    count to every worker; `uvicorn --workers N`, `gunicorn -w N` (without our
+    config) and WEB_CONCURRENCY leave it unset, which keeps caching off.
+    """
+    return os.getenv("WORKERS") == "1" and os.getenv("WEB_CONCURRENCY", "1") == "1"
+
+
+def _generation_key(namespace: str) -> str:
+    # Deliberately outside the namespace, so `<namespace>:*` never matches it.
+    return f"generation:{namespace}"
+
+
+class ResponseCache:
+    """
+    Stores encoded JSON bodies in Redis when configured, otherwise in a
+    process-local LRU. The local store and its generations are invisible to
+    other worker processes, so without Redis caching is only enabled when the
+    app knows it runs as a single process (see `_known_single_process`);
+    otherwise `generation()` returns None and callers skip caching altogether.
+
+    Each namespace ("products", "categories") has a generation counter that is
+    part of every key; writes bump it via `invalidate()`.
+    """
+
+    def __init__(self):
+        self.client = None
+        self._local: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self.local_enabled = False
+
+    async def connect(self, url: Optional[str]):
+        if not url or aioredis is None:
+            self.local_enabled = _known_single_process()
+            if self.local_enabled:
+                print("--- [CACHE] Redis not configured, using in-process cache. ---")
+            else:
+                print("--- [CACHE] Redis not configured, caching disabled. ---")
+            return
+        self.client = aioredis.from_url(url)
+        # Log the location only: the URL may carry credentials (user:pass@).
+        parts = urlsplit(url)
+        location = parts.netloc.rpartition("@")[2] or parts.path
+        print(f"--- [CACHE] Using Redis response cache at {location}. ---")
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if self.client is None:
+            entry = self._local.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            self._local.move_to_end(key)
+            return entry[0]
+        try:
+            return await self.client.get(key)
+        except aioredis.RedisError:
+            return None
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int):
+        if self.client is None:
+            self._local[key] = (value, time.monotonic() + ttl_seconds)
+            self._local.move_to_end(key)
+            if len(self._local) > LOCAL_CACHE_MAX_ENTRIES:
+                self._local.popitem(last=False)
+            return
+        try:
+            await self.client.set(key, value, ex=ttl_seconds)
+        except aioredis.RedisError:
+            pass
+
+    async def generation(self, namespace: str) -> Optional[int]:
+        """Current generation of `namespace`, or None if it can't be read."""
+        if self.client is None:
+            if not self.local_enabled:
+                return None
+            return self._generations.get(namespace, 0)
+        try:
+            value = await self.client.get(_generation_key(namespace))
+        except aioredis.RedisError:
+            return None
+        return int(value or 0)
+
+    async def invalidate(self, *namespaces: str):
+        """
+        Bumps the generation of each namespace, so bodies stored under the old
+        one (including loads that were still running during the write) are
+        never read again, then drops the entries already stored.
+        Call after the write has been committed.
+        """
+        if self.client is None:
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+        else:
+            try:
+                for namespace in namespaces:
+                    await self.client.incr(_generation_key(namespace))
+            except aioredis.RedisError as exc:
+                # Other workers keep serving their copies until the TTLs run
+                # out (response bodies, and PRICE_CACHE_TTL_SECONDS in app.py).
+                print(
+                    f"--- [CACHE] Failed to invalidate {', '.join(namespaces)} "
+                    f"({type(exc).__name__}: {exc}); stale entries expire with "
+                    "their TTL. ---"
+                )
+        await self.delete_pattern(*(f"{namespace}:*" for namespace in namespaces))
+
+    async def delete_pattern(self, *patterns: str):
+        """Deletes every key matching any of the given glob patterns."""
+        if self.client is None:
+            for key in list(self._local):
+                if any(fnmatchcase(key, pattern) for pattern in patterns):
+                    del self._local[key]
+            return
+        try:
+            for pattern in patterns:
+                keys = [key async for key in self.client.scan_iter(match=pattern)]
+                if keys:
+                    await self.client.delete(*keys)
+        except aioredis.RedisError:
+            pass
+
+
+cache = ResponseCache()
+
+
+def _cache_key(prefix: str, generation: Union[int, str], kwargs: dict) -> str:
+    """Builds a key from the endpoint's plain (JSON-able) arguments only."""
+    params = {
+        name: value
+        for name, value in kwargs.items()
+        if isinstance(value, (str, int, float, bool, type(None)))
+    }
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f"{prefix}:{generation}:{digest}"
+
+
+def _etag(body: bytes) -> str:
+    """Content-derived, so every worker (and Redis) agrees on it for free."""
+    return '"%s"' % hashlib.sha1(body).hexdigest()
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def cached(prefix: str, ttl_seconds: int):
+    """
+    Caches an endpoint's encoded JSON body under
+    `prefix:<generation>:<hash of args>`, so a hit skips both the query and
+    the serialization; concurrent misses share one load (see `singleflight`).
+    The generation is that of the prefix's namespace (e.g. "products" for
+    "products:list"). Responses carry an ETag and a matching `If-None-Match` is
+    answered with an empty 304.
+    The endpoint must return response-schema instances (not ORM objects), since
+    the encoded body is returned directly and skips `response_model` handling.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        # The wrapper needs the request for If-None-Match; ask FastAPI for it
+        # unless the endpoint already takes one.
+        inject_request = "request" not in signature.parameters
+        namespace = prefix.split(":", 1)[0]
+
+        @wraps(func)
+        async def wrapper(**kwargs):
+            request = kwargs.pop("request") if inject_request else kwargs["request"]
+
+            async def load() -> bytes:
+                return orjson.dumps(jsonable_encoder(await func(**kwargs)))
+
+            generation = await cache.generation(namespace)
+            if generation is None:
+                # No way to tell whether a stored body is current: skip caching,
+                # but still let concurrent requests share the one in-flight load.
+                body = await singleflight(_cache_key(prefix, "nogen", kwargs), load)
+            else:
+                key = _cache_key(prefix, generation, kwargs)
+                body = await cache.get(key)
+                if body is None:
+
+                    async def load_and_store() -> bytes:
+                        fresh = await load()
+                        await cache.set(key, fresh, ttl_seconds)
+                        return fresh
+
+                    body = await singleflight(key, load_and_store)
+
+            etag = _etag(body)
+            if _etag_matches(request, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+            return Response(
+                content=body, media_type="application/json", headers={"ETag": etag}
+            )
+
+        if inject_request:
+            request_param = inspect.Parameter(
+                "request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+            )
+            wrapper.__signature__ = signature.replace(
+                parameters=[*signature.parameters.values(), request_param]
+            )
+        return wrapper
+
+    return decorator
+
+
+# --- Request coalescing ("singleflight") ---
+
+_inflight: Dict[str, "asyncio.Future[Any]"] = {}
+
+
+async def singleflight(key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Runs `load()` once for all concurrent callers sharing `key`: the first
+    caller does the work, the others await its result. `load` must return
+    session-independent data (e.g. schema instances), as it is shared.
+    """
+    future = _inflight.get(key)
+    if future is not None:
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise  # this caller was cancelled, not the leader
+            return await singleflight(key, load)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await load()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(key, None)
@@ -0,0 +1,60 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+
+# Usage: gunicorn app:app -c gunicorn_conf.py
+#
+# Each worker is its own process with its own connection pool, so the
+# database sees up to WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+# e.g. Postgres with max_connections=100 and 4 workers: keep pool_size +
+# max_overflow <= 20 per worker to leave headroom for admin/migrations.
+#
+# Default to a single worker (relying on async + WAL for concurrency) unless
+# both of these hold:
+# - the database is not SQLite, which allows one writer at a time;
+# - REDIS_URL is set. The response cache and the price cache stay consistent
+#   across processes only through Redis; without it they are process-local.
+# Without REDIS_URL the app only caches in process when it knows there is a
+# single worker; `post_fork` below tells each worker the resolved count (also
+# when overridden with -w), so more workers turn both caches off rather than
+# serve stale data.
+_database_url = os.getenv("DATABASE_URL", "sqlite")
+_multi_worker_safe = not _database_url.startswith("sqlite") and bool(
+    os.getenv("REDIS_URL")
+)
+_default_workers = multiprocessing.cpu_count() * 2 if _multi_worker_safe else 1
+
+workers = int(os.getenv("WORKERS", _default_workers))
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+keepalive = 5
+
+
+# Schema creation + seeding (SHOEAPP_INIT_DB) runs once, in a child process of
+# the master before any worker boots; workers starting it concurrently race on
+# CREATE TABLE / seed inserts, and a failed worker lifespan stops gunicorn.
+_INIT_DB_SCRIPT = """
+import asyncio
+from models import create_tables, engine
+
+async def main():
+    try:
+        await create_tables()
+    finally:
+        await engine.dispose()
+
+asyncio.run(main())
+"""
+
+
+def on_starting(server):
+    if os.getenv("SHOEAPP_INIT_DB", "1") == "1":
+        subprocess.run([sys.executable, "-c", _INIT_DB_SCRIPT], check=True)
+    # Inherited by the workers, whose lifespan then skips create_tables().
+    os.environ["SHOEAPP_INIT_DB"] = "0"
+
+
+def post_fork(server, worker):
+    # Runs in the worker before the app is imported (no preload_app).
+    os.environ["WORKERS"] = str(server.cfg.workers)
@@ -1,25 +1,28 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Generic, List, Optional, TypeVar, Union
 from datetime import datetime  # FIX: Import datetime for use in Pydantic schemas
 
+# Shared config for response schemas read from ORM objects / DB rows.
+ORM_CONFIG = ConfigDict(from_attributes=True)
+
 # --- User Schemas ---
 
 
 class UserBase(BaseModel):
     username: str
     email: str
-    is_admin: bool = False
 
 
 class UserCreate(UserBase):
+    # NOTE: No is_admin here; new users are never admins (see /admin/promote).
     password: str
 
 
 class User(UserBase):
+    is_admin: bool = False
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ORM_CONFIG
 
 
 # --- Category Schemas ---
@@ -36,8 +39,7 @@ class CategoryCreate(CategoryBase):
 class Category(CategoryBase):
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ORM_CONFIG
 
 
 # --- Product Schemas ---
@@ -58,11 +60,9 @@ class ProductCreate(ProductBase):
 
 class Product(ProductBase):
     id: int
-    # FIX APPLIED: Replaced 'int | None' with 'Optional[int]' for Python 3.8 compatibility.
-    category_id: Optional[int]  # Allows category_id to be an integer or None
+    # category_id (Optional[int]) is inherited from ProductBase.
 
-    class Config:
-        from_attributes = True
+    model_config = ORM_CONFIG
 
 
 # --- Cart Schemas ---
@@ -79,8 +79,7 @@ class Cart(BaseModel):
     product_id: int
     quantity: int
 
-    class Config:
-        from_attributes = True
+    model_config = ORM_CONFIG
 
 
 # --- Order Schemas ---
@@ -96,5 +95,16 @@ class Order(OrderBase):
     user_id: int
     order_date: datetime  # <-- This now works because datetime is imported
 
-    class Config:
-        from_attributes = True
+    model_config = ORM_CONFIG
+
+
+# --- Pagination ---
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """One keyset page; pass `next_cursor` back as `cursor` for the next one."""
+
+    items: List[T]
+    next_cursor: Optional[int] = None  # None on the last page
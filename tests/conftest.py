@@ -0,0 +1,73 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+# Point the app at a throwaway, seeded SQLite database before it is imported;
+# no Redis and a known single worker, so the in-process caches are used.
+_db_dir = tempfile.mkdtemp(prefix="shoeapp-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/test.db"
+os.environ["SHOEAPP_INIT_DB"] = "1"
+os.environ.pop("REDIS_URL", None)
+os.environ["WORKERS"] = "1"
+os.environ.pop("WEB_CONCURRENCY", None)
+
+from app import app  # noqa: E402
+from cache import cache  # noqa: E402
+from models import engine  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    """
+    Drives the app in the test's event loop (httpx + ASGITransport), so the
+    request-scoped ContextVars and the engine listener below see the requests.
+    """
+    # Start every test with cold response/price caches.
+    await cache.invalidate("products", "categories")
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            yield client
+
+
+@pytest.fixture
+def mock_user_id(client) -> int:
+    return app.state.mock_user_id
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Returns a context manager collecting the SQL statements executed inside
+    it, e.g.
+
+        with count_queries() as queries:
+            await client.get("/products")
+        assert len(queries) == 1
+    """
+
+    @contextmanager
+    def _count_queries():
+        queries = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            queries.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        try:
+            yield queries
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    return _count_queries
@@ -0,0 +1,159 @@
+"""
+Pins the number of SQL statements each endpoint issues, so an N+1 (e.g. a
+lazy relationship load sneaking into a listing) fails here instead of in
+production.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import update
+
+import app as app_module
+from cache import cache
+from models import Product, SessionLocal
+
+pytestmark = pytest.mark.anyio
+
+
+async def fill_cart(client):
+    products = (await client.get("/products")).json()["items"]
+    for product in products:
+        response = await client.post(
+            "/cart/add", json={"product_id": product["id"], "quantity": 2}
+        )
+        assert response.status_code == 200
+    return products
+
+
+async def test_list_products_is_one_query_then_cached(client, count_queries):
+    with count_queries() as queries:
+        first = await client.get("/products")
+    assert first.status_code == 200
+    assert len(queries) == 1
+
+    with count_queries() as queries:
+        second = await client.get("/products")
+    assert second.content == first.content
+    assert len(queries) == 0
+
+
+async def test_list_categories_is_one_query_then_cached(client, count_queries):
+    with count_queries() as queries:
+        await client.get("/categories")
+    assert len(queries) == 1
+
+    with count_queries() as queries:
+        await client.get("/categories")
+    assert len(queries) == 0
+
+
+async def test_uncached_listing_still_coalesces(client, count_queries, monkeypatch):
+    async def no_generation(namespace):
+        return None  # e.g. Redis unreachable
+
+    monkeypatch.setattr(cache, "generation", no_generation)
+
+    with count_queries() as queries:
+        responses = await asyncio.gather(*(client.get("/products") for _ in range(20)))
+    assert all(response.status_code == 200 for response in responses)
+    assert len(queries) == 1
+
+
+async def test_product_write_invalidates_cached_listing(client, count_queries):
+    product = (await client.get("/products")).json()["items"][0]
+    response = await client.put(
+        f"/products/{product['id']}", json={**product, "name": "Renamed"}
+    )
+    assert response.status_code == 200
+
+    with count_queries() as queries:
+        listed = (await client.get("/products")).json()["items"][0]
+    assert len(queries) == 1
+    assert listed["name"] == "Renamed"
+
+    await client.put(f"/products/{product['id']}", json=product)
+
+
+async def test_get_cart_is_two_queries(client, count_queries, mock_user_id):
+    await fill_cart(client)
+
+    # Mock user lookup + one SELECT of the cart lines, however many there are.
+    with count_queries() as queries:
+        response = await client.get(f"/cart/{mock_user_id}")
+    assert response.status_code == 200
+    assert len(response.json()["items"]) >= 6
+    assert len(queries) == 2
+
+    await client.post("/orders/create")
+
+
+async def test_add_to_cart_is_two_queries(client, count_queries):
+    product = (await client.get("/products")).json()["items"][0]
+
+    # Mock user lookup + a single UPSERT.
+    with count_queries() as queries:
+        response = await client.post(
+            "/cart/add", json={"product_id": product["id"], "quantity": 1}
+        )
+    assert response.status_code == 200
+    assert len(queries) == 2
+
+    await client.post("/orders/create")
+
+
+async def test_place_order_is_bounded(client, count_queries):
+    products = await fill_cart(client)
+
+    # Mock user, cart lines, INSERT order, DELETE cart: prices come from the
+    # in-process price cache, so the count doesn't grow with the cart.
+    with count_queries() as queries:
+        response = await client.post("/orders/create")
+    assert response.status_code == 201
+    assert response.json()["total_amount"] == pytest.approx(
+        sum(product["price"] * 2 for product in products)
+    )
+    assert len(queries) == 4
+
+
+async def set_price(product_id, price):
+    async with SessionLocal() as db:
+        await db.execute(
+            update(Product).where(Product.id == product_id).values(price=price)
+        )
+        await db.commit()
+
+
+async def test_place_order_rereads_expired_prices(client, count_queries, monkeypatch):
+    products = await fill_cart(client)
+    product = products[0]
+
+    # A price change whose invalidation never reached this worker: once the
+    # price cache expires, checkout must stop charging the old price.
+    await set_price(product["id"], product["price"] + 1)
+    monkeypatch.setattr(app_module, "_price_cache_expires_at", 0.0)
+    try:
+        with count_queries() as queries:
+            response = await client.post("/orders/create")
+    finally:
+        await set_price(product["id"], product["price"])
+
+    assert len(queries) == 5  # + one SELECT reloading the prices
+    assert response.json()["total_amount"] == pytest.approx(
+        sum(p["price"] * 2 for p in products) + 2
+    )
+
+
+@pytest.mark.parametrize("path", ["/orders", "/orders/user/{user_id}"])
+async def test_order_listings_do_not_lazy_load(
+    client, count_queries, mock_user_id, path
+):
+    for _ in range(3):
+        await fill_cart(client)
+        await client.post("/orders/create")
+
+    with count_queries() as queries:
+        response = await client.get(path.format(user_id=mock_user_id))
+    assert response.status_code == 200
+    assert len(response.json()["items"]) >= 3
+    assert len(queries) <= 2
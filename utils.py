@@ -1,10 +1,21 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
 from datetime import timedelta
 from typing import Optional
+
 # Omitted imports from jose (JWT library)
 
 # Password hashing setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# NOTE: 10 rounds (~4x cheaper than the default 12) is plenty for this mock
+# auth setup; existing 12-round hashes still verify.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=10)
+
+# Worker processes for bcrypt, started/stopped by the app lifespan. Hashing is
+# pure CPU, so it runs outside the event loop (and outside the GIL).
+HASH_POOL_WORKERS = 2
+_hash_pool: Optional[ProcessPoolExecutor] = None
 
 # MOCK JWT configuration (Retained for structure, but logic is gone)
 SECRET_KEY = "MOCK_KEY"
@@ -19,4 +30,31 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def start_hash_pool(max_workers: int = HASH_POOL_WORKERS):
+    """Starts the process pool used by `hash_password_async`."""
+    global _hash_pool
+    if _hash_pool is None:
+        # "spawn": workers start lazily on the first hash, by which time the
+        # process already runs threads (event loop, aiosqlite), and forking a
+        # multi-threaded process can deadlock.
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+
+async def shutdown_hash_pool():
+    """Stops the pool, waiting for running hashes off the event loop."""
+    global _hash_pool
+    if _hash_pool is not None:
+        pool, _hash_pool = _hash_pool, None
+        await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hashes a password without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    # Falls back to the default thread pool if the process pool isn't running.
+    return await loop.run_in_executor(_hash_pool, get_password_hash, password)
+
+
 # Removed: verify_password, create_access_token, decode_access_token